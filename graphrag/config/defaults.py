@@ -297,6 +297,10 @@ class LanguageModelDefaults:
     concurrent_requests: int = 25
     responses: None = None
     async_mode: AsyncType = AsyncType.Threaded
+    allow_batch_api: bool = False
+    batch_api_threshold: int = 1000
+    batch_api_poll_interval: float = 30.0
+    batch_api_timeout: float = 3600.0
 
 
 @dataclass
@@ -262,6 +262,22 @@ class LanguageModelConfig(BaseModel):
     async_mode: AsyncType = Field(
         description="The async mode to use.", default=language_model_defaults.async_mode
     )
+    allow_batch_api: bool = Field(
+        description="Whether to send large embedding requests through the OpenAI Batch API.",
+        default=language_model_defaults.allow_batch_api,
+    )
+    batch_api_threshold: int = Field(
+        description="The minimum number of texts in an embedding request before the Batch API is used.",
+        default=language_model_defaults.batch_api_threshold,
+    )
+    batch_api_poll_interval: float = Field(
+        description="The number of seconds to wait between Batch API status checks.",
+        default=language_model_defaults.batch_api_poll_interval,
+    )
+    batch_api_timeout: float = Field(
+        description="The maximum number of seconds to wait for a Batch API job before cancelling it.",
+        default=language_model_defaults.batch_api_timeout,
+    )
     responses: list[str | BaseModel] | None = Field(
         default=language_model_defaults.responses,
         description="Static responses to use in mock mode.",
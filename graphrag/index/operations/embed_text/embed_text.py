@@ -141,19 +141,26 @@ async def _text_embed_with_vector_store(
 
     all_results = []
 
+    # The Batch API only pays off on large jobs, so embed every row in one strategy
+    # call and load the vectors into the store in insert-sized batches afterwards
+    all_vectors: list | None = None
+    if (strategy.get("llm") or {}).get("allow_batch_api"):
+        all_texts: list[str] = input[embed_column].to_numpy().tolist()
+        result = await strategy_exec(all_texts, callbacks, cache, strategy_config)
+        all_vectors = result.embeddings or []
+
     while insert_batch_size * i < input.shape[0]:
         batch = input.iloc[insert_batch_size * i : insert_batch_size * (i + 1)]
         texts: list[str] = batch[embed_column].to_numpy().tolist()
         titles: list[str] = batch[title].to_numpy().tolist()
         ids: list[str] = batch[id_column].to_numpy().tolist()
-        result = await strategy_exec(texts, callbacks, cache, strategy_config)
-        if result.embeddings:
-            embeddings = [
-                embedding for embedding in result.embeddings if embedding is not None
-            ]
-            all_results.extend(embeddings)
-
-        vectors = result.embeddings or []
+        if all_vectors is not None:
+            vectors = all_vectors[insert_batch_size * i : insert_batch_size * (i + 1)]
+        else:
+            result = await strategy_exec(texts, callbacks, cache, strategy_config)
+            vectors = result.embeddings or []
+        all_results.extend(vector for vector in vectors if vector is not None)
+
         documents: list[VectorStoreDocument] = []
         for doc_id, doc_text, doc_title, doc_vector in zip(
             ids, texts, titles, vectors, strict=True
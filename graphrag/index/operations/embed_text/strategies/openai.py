@@ -48,12 +48,16 @@ async def run(
 
     # Break up the input texts. The sizes here indicate how many snippets are in each input text
     texts, input_sizes = _prepare_embed_texts(input, splitter)
-    text_batches = _create_text_batches(
-        texts,
-        batch_size,
-        batch_max_tokens,
-        splitter,
-    )
+    if llm_config.allow_batch_api and len(texts) >= llm_config.batch_api_threshold:
+        # Send every snippet in one request so the model can submit them as a Batch API job
+        text_batches = [texts]
+    else:
+        text_batches = _create_text_batches(
+            texts,
+            batch_size,
+            batch_max_tokens,
+            splitter,
+        )
     log.info(
         "embedding %d inputs via %d snippets using %d batches. max_batch_size=%d, batch_max_tokens=%d",
         len(input),
@@ -89,7 +93,9 @@ async def _execute(
     async def embed(chunk: list[str]):
         async with semaphore:
             chunk_embeddings = await model.aembed_batch(chunk)
-            result = np.array(chunk_embeddings)
+            # float32 halves the footprint of float64 while embeddings are held in memory;
+            # values are widened again when stored, so they carry float32 rounding
+            result = np.asarray(chunk_embeddings, dtype=np.float32)
             tick(1)
         return result
 
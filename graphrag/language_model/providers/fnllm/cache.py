@@ -3,6 +3,10 @@
 
 """FNLLM Cache provider."""
 
+import hashlib
+import threading
+from array import array
+from collections import OrderedDict
 from typing import Any
 
 from fnllm.caching import Cache as FNLLMCache
@@ -42,3 +46,53 @@ class FNLLMCacheProvider(FNLLMCache):
         """Create a child cache."""
         child_cache = self._cache.child(key)
         return FNLLMCacheProvider(child_cache)
+
+
+class EmbeddingMemoryCache:
+    """An in-process LRU cache of embeddings keyed by namespace and text hash.
+
+    Embeddings are stored as packed float32 arrays and the cache is bounded by their total size in bytes.
+    """
+
+    def __init__(self, max_bytes: int):
+        self._max_bytes = max_bytes
+        self._bytes = 0
+        self._entries: OrderedDict[tuple[str, bytes], array[float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(namespace: str, text: str) -> tuple[str, bytes]:
+        return namespace, hashlib.sha256(text.encode("utf-8")).digest()
+
+    def get(self, namespace: str, text: str) -> list[float] | None:
+        """Retrieve a copy of the embedding of a text, if it has been cached."""
+        key = self._key(namespace, text)
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is None:
+                return None
+            self._entries.move_to_end(key)
+        return embedding.tolist()
+
+    def set(self, namespace: str, text: str, embedding: list[float]) -> None:
+        """Cache the embedding of a text, evicting the least recently used entries if full."""
+        key = self._key(namespace, text)
+        entry = array("f", embedding)
+        size = len(entry) * entry.itemsize
+        if size > self._max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous) * previous.itemsize
+            self._entries[key] = entry
+            self._bytes += size
+            while self._bytes > self._max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted) * evicted.itemsize
+
+    def clear(self) -> None:
+        """Clear the cache."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
@@ -5,32 +5,45 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import asyncio
+import atexit
+import functools
+import os
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, ClassVar, TextIO, cast
 
+import tiktoken
 from fnllm.openai import (
     create_openai_chat_llm,
     create_openai_client,
     create_openai_embeddings_llm,
 )
 
+from graphrag.language_model.providers.fnllm.cache import EmbeddingMemoryCache
 from graphrag.language_model.providers.fnllm.events import FNLLMEvents
 from graphrag.language_model.providers.fnllm.utils import (
+    BATCH_MAX_REQUESTS,
+    BUCKET_MIN_BATCH_SIZE,
+    EmbeddingCoalescer,
     _create_cache,
     _create_error_handler,
     _create_openai_config,
+    bucket_by_length,
     run_coroutine_sync,
+    run_embeddings_batch_job,
 )
 from graphrag.language_model.response.base import (
     BaseModelOutput,
     BaseModelResponse,
     ModelResponse,
 )
-import tiktoken
 
 if TYPE_CHECKING:
     from collections.abc import AsyncGenerator, Generator
 
     from fnllm.openai.types.client import OpenAIChatLLM as FNLLMChatLLM
+    from fnllm.openai.types.client import OpenAIClient
     from fnllm.openai.types.client import OpenAIEmbeddingsLLM as FNLLMEmbeddingLLM
 
     from graphrag.cache.pipeline_cache import PipelineCache
@@ -39,230 +52,95 @@ if TYPE_CHECKING:
         LanguageModelConfig,
     )
 
-running_est_cost: float = 0.0
 MAX_COST: float = 50.0
-INPUT_COST: float = 5.0 # Cost per million input tokens
-OUTPUT_COST: float = 15.0 # Cost per million output tokens
-EMBEDDING_COST: float = 0.02 # Cost per million embedding tokens
-def log_tokens(input_tokens: int = 0, output_tokens: int = 0, embedding_tokens:int = 0) -> None:
-    assert isinstance(input_tokens, int) and input_tokens >= 0, "Input tokens must be a non-negative integer"
-    assert isinstance(output_tokens, int) and output_tokens >= 0, "Output tokens must be a non-negative integer"
-    assert isinstance(embedding_tokens, int) and embedding_tokens >= 0, "Embedding tokens must be a non-negative integer"
-    with open("/home/stephen/graphrag-experiments/token_usage.log", "a") as f:
-        f.write(f"{input_tokens},{output_tokens},{embedding_tokens}\n")
-    
-    global running_est_cost
-    running_est_cost += input_tokens / 1_000_000 * INPUT_COST
-    running_est_cost += output_tokens / 1_000_000 * OUTPUT_COST
-    running_est_cost += embedding_tokens / 1_000_000 * EMBEDDING_COST
-
-    if running_est_cost > MAX_COST:
-        msg = f"Estimated cost exceeded {MAX_COST} USD: {running_est_cost} USD"
-        raise Exception(msg)
-
-class OpenAIChatFNLLM:
-    """An OpenAI Chat Model provider using the fnllm library."""
-
-    model: FNLLMChatLLM
-
-    def __init__(
-        self,
-        *,
-        name: str,
-        config: LanguageModelConfig,
-        callbacks: WorkflowCallbacks | None = None,
-        cache: PipelineCache | None = None,
-    ) -> None:
-        model_config = _create_openai_config(config, azure=False)
-        error_handler = _create_error_handler(callbacks) if callbacks else None
-        model_cache = _create_cache(cache, name)
-        client = create_openai_client(model_config)
-        self.model = create_openai_chat_llm(
-            model_config,
-            client=client,
-            cache=model_cache,
-            events=FNLLMEvents(error_handler) if error_handler else None,
+INPUT_COST: float = 5.0  # Cost per million input tokens
+OUTPUT_COST: float = 15.0  # Cost per million output tokens
+EMBEDDING_COST: float = 0.02  # Cost per million embedding tokens
+COST_CHECK_INTERVAL: int = 64  # Number of log_tokens calls between budget checks
+COST_LOG_ENABLED: bool = bool(os.environ.get("GRAPHRAG_COST_LOG"))
+USAGE_LOG_PATH: str = os.environ.get("GRAPHRAG_COST_LOG_PATH", "./token_usage.log")
+USAGE_LOG_BUFFER_SIZE: int = 1 << 16
+
+# Costs are tracked as integer nano-USD; a cost per million tokens is nano-USD per token x 1000.
+_MAX_COST_NANO_USD = round(MAX_COST * 1_000_000_000)
+_INPUT_COST_NANO_USD = round(INPUT_COST * 1000)
+_OUTPUT_COST_NANO_USD = round(OUTPUT_COST * 1000)
+_EMBEDDING_COST_NANO_USD = round(EMBEDDING_COST * 1000)
+
+_usage_lock = threading.Lock()
+_usage_log_file: TextIO | None = None
+_running_cost_nano_usd: int = 0
+_log_tokens_calls: int = 0
+
+
+def _get_usage_log_file() -> TextIO:
+    """Open the token usage log once and keep the handle for the process lifetime."""
+    global _usage_log_file
+    if _usage_log_file is None:
+        _usage_log_file = Path(USAGE_LOG_PATH).open(  # noqa: SIM115
+            "a", buffering=USAGE_LOG_BUFFER_SIZE
         )
-        self.config = config
-
-    async def achat(
-        self, prompt: str, history: list | None = None, **kwargs
-    ) -> ModelResponse:
-        """
-        Chat with the Model using the given prompt.
-
-        Args:
-            prompt: The prompt to chat with.
-            kwargs: Additional arguments to pass to the Model.
-
-        Returns
-        -------
-            The response from the Model.
-        """
-        if history is None:
-            response = await self.model(prompt, **kwargs)
-        else:
-            response = await self.model(prompt, history=history, **kwargs)
-        return BaseModelResponse(
-            output=BaseModelOutput(
-                content=response.output.content,
-                full_response=response.output.raw_model.to_dict(),
-            ),
-            parsed_response=response.parsed_json,
-            history=response.history,
-            cache_hit=response.cache_hit,
-            tool_calls=response.tool_calls,
-            metrics=response.metrics,
-        )
-
-    async def achat_stream(
-        self, prompt: str, history: list | None = None, **kwargs
-    ) -> AsyncGenerator[str, None]:
-        """
-        Stream Chat with the Model using the given prompt.
-
-        Args:
-            prompt: The prompt to chat with.
-            kwargs: Additional arguments to pass to the Model.
-
-        Returns
-        -------
-            A generator that yields strings representing the response.
-        """
-        if history is None:
-            response = await self.model(prompt, stream=True, **kwargs)
-        else:
-            response = await self.model(prompt, history=history, stream=True, **kwargs)
-        async for chunk in response.output.content:
-            if chunk is not None:
-                yield chunk
-
-    def chat(self, prompt: str, history: list | None = None, **kwargs) -> ModelResponse:
-        """
-        Chat with the Model using the given prompt.
-
-        Args:
-            prompt: The prompt to chat with.
-            kwargs: Additional arguments to pass to the Model.
-
-        Returns
-        -------
-            The response from the Model.
-        """
-        return run_coroutine_sync(self.achat(prompt, history=history, **kwargs))
-
-    def chat_stream(
-        self, prompt: str, history: list | None = None, **kwargs
-    ) -> Generator[str, None]:
-        """
-        Stream Chat with the Model using the given prompt.
-
-        Args:
-            prompt: The prompt to chat with.
-            kwargs: Additional arguments to pass to the Model.
-
-        Returns
-        -------
-            A generator that yields strings representing the response.
-        """
-        msg = "chat_stream is not supported for synchronous execution"
-        raise NotImplementedError(msg)
-
-
-class OpenAIEmbeddingFNLLM:
-    """An OpenAI Embedding Model provider using the fnllm library."""
-
-    model: FNLLMEmbeddingLLM
-
-    def __init__(
-        self,
-        *,
-        name: str,
-        config: LanguageModelConfig,
-        callbacks: WorkflowCallbacks | None = None,
-        cache: PipelineCache | None = None,
-    ) -> None:
-        model_config = _create_openai_config(config, azure=False)
-        error_handler = _create_error_handler(callbacks) if callbacks else None
-        model_cache = _create_cache(cache, name)
-        client = create_openai_client(model_config)
-        self.model = create_openai_embeddings_llm(
-            model_config,
-            client=client,
-            cache=model_cache,
-            events=FNLLMEvents(error_handler) if error_handler else None,
+        atexit.register(_usage_log_file.close)
+    return _usage_log_file
+
+
+def log_tokens(
+    input_tokens: int = 0, output_tokens: int = 0, embedding_tokens: int = 0
+) -> None:
+    """Record token usage and raise once the estimated spend exceeds MAX_COST.
+
+    This is a no-op unless the GRAPHRAG_COST_LOG environment variable is set.
+    """
+    if not COST_LOG_ENABLED:
+        return
+    if __debug__:
+        for tokens in (input_tokens, output_tokens, embedding_tokens):
+            assert isinstance(tokens, int) and tokens >= 0, (  # noqa: S101, PT018
+                "Token counts must be non-negative integers"
+            )
+
+    delta = (
+        input_tokens * _INPUT_COST_NANO_USD
+        + output_tokens * _OUTPUT_COST_NANO_USD
+        + embedding_tokens * _EMBEDDING_COST_NANO_USD
+    )
+    global _running_cost_nano_usd, _log_tokens_calls
+    with _usage_lock:
+        _get_usage_log_file().write(
+            f"{input_tokens},{output_tokens},{embedding_tokens}\n"
         )
-        self.config = config
+        _running_cost_nano_usd += delta
+        _log_tokens_calls += 1
+        if _log_tokens_calls % COST_CHECK_INTERVAL:
+            return
+        est_cost = _running_cost_nano_usd
 
-    async def aembed_batch(self, text_list: list[str], **kwargs) -> list[list[float]]:
-        """
-        Embed the given text using the Model.
+    if est_cost > _MAX_COST_NANO_USD:
+        msg = f"Estimated cost exceeded {MAX_COST} USD: {est_cost / 1_000_000_000} USD"
+        raise Exception(msg)  # noqa: TRY002
 
-        Args:
-            text: The text to embed.
-            kwargs: Additional arguments to pass to the LLM.
 
-        Returns
-        -------
-            The embeddings of the text.
-        """
-        response = await self.model(text_list, **kwargs)
-        if response.output.embeddings is None:
-            msg = "No embeddings found in response"
-            raise ValueError(msg)
-        embeddings: list[list[float]] = response.output.embeddings
-        return embeddings
-
-    async def aembed(self, text: str, **kwargs) -> list[float]:
-        """
-        Embed the given text using the Model.
-
-        Args:
-            text: The text to embed.
-            kwargs: Additional arguments to pass to the Model.
-
-        Returns
-        -------
-            The embeddings of the text.
-        """
-        response = await self.model([text], **kwargs)
-        if response.output.embeddings is None:
-            msg = "No embeddings found in response"
-            raise ValueError(msg)
-        embeddings: list[float] = response.output.embeddings[0]
-        return embeddings
-
-    def embed_batch(self, text_list: list[str], **kwargs) -> list[list[float]]:
-        """
-        Embed the given text using the Model.
-
-        Args:
-            text: The text to embed.
-            kwargs: Additional arguments to pass to the LLM.
-
-        Returns
-        -------
-            The embeddings of the text.
-        """
-        return run_coroutine_sync(self.aembed_batch(text_list, **kwargs))
+EMBEDDING_MEMORY_CACHE_BYTES: int = 64 * 1024 * 1024  # About 5,000 3072-dim vectors
+_embedding_memory_cache = EmbeddingMemoryCache(EMBEDDING_MEMORY_CACHE_BYTES)
 
-    def embed(self, text: str, **kwargs) -> list[float]:
-        """
-        Embed the given text using the Model.
 
-        Args:
-            text: The text to embed.
-            kwargs: Additional arguments to pass to the Model.
+@functools.lru_cache(maxsize=32)
+def _get_encoding(model: str) -> tiktoken.Encoding:
+    """Get the tiktoken encoding for a model, falling back to cl100k_base."""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        # Fallback to a default encoding if the model is not recognized by tiktoken
+        return tiktoken.get_encoding("cl100k_base")
 
-        Returns
-        -------
-            The embeddings of the text.
-        """
-        return run_coroutine_sync(self.aembed(text, **kwargs))
 
+class _BaseChatFNLLM:
+    """A base Chat Model provider using the fnllm library."""
 
-class AzureOpenAIChatFNLLM:
-    """An Azure OpenAI Chat LLM provider using the fnllm library."""
+    _AZURE: ClassVar[bool] = False
+    """Whether the provider targets Azure OpenAI."""
+    _LOG_TOKENS: ClassVar[bool] = False
+    """Whether to record token usage with log_tokens, including streamed usage."""
 
     model: FNLLMChatLLM
 
@@ -274,7 +152,12 @@ class AzureOpenAIChatFNLLM:
         callbacks: WorkflowCallbacks | None = None,
         cache: PipelineCache | None = None,
     ) -> None:
-        model_config = _create_openai_config(config, azure=True)
+        # Older Azure API versions reject stream_options, so only request usage when it is logged
+        model_config = _create_openai_config(
+            config,
+            azure=self._AZURE,
+            track_stream_usage=self._LOG_TOKENS and COST_LOG_ENABLED,
+        )
         error_handler = _create_error_handler(callbacks) if callbacks else None
         model_cache = _create_cache(cache, name)
         client = create_openai_client(model_config)
@@ -301,16 +184,15 @@ class AzureOpenAIChatFNLLM:
         -------
             The response from the Model.
         """
-        if history is None:
-            response = await self.model(prompt, **kwargs)
-        else:
-            response = await self.model(prompt, history=history, **kwargs)
-        log_tokens(response.metrics.usage.input_tokens, response.metrics.usage.output_tokens)
+        if history is not None:
+            kwargs["history"] = history
+        response = await self.model(prompt, **kwargs)
+        if self._LOG_TOKENS:
+            usage = response.metrics.usage
+            log_tokens(usage.input_tokens, usage.output_tokens)
+        output = response.output
         return BaseModelResponse(
-            output=BaseModelOutput(
-                content=response.output.content,
-                full_response=response.output.raw_model.to_dict(),
-            ),
+            output=BaseModelOutput(content=output.content, raw_model=output.raw_model),
             parsed_response=response.parsed_json,
             history=response.history,
             cache_hit=response.cache_hit,
@@ -318,6 +200,22 @@ class AzureOpenAIChatFNLLM:
             metrics=response.metrics,
         )
 
+    async def achat_many(self, prompts: list[str], **kwargs) -> list[ModelResponse]:
+        """
+        Chat with the Model using each of the given prompts.
+
+        Args:
+            prompts: The prompts to chat with.
+            kwargs: Additional arguments to pass to the Model.
+
+        Returns
+        -------
+            The responses from the Model, in the order of the prompts.
+        """
+        return list(
+            await asyncio.gather(*(self.achat(prompt, **kwargs) for prompt in prompts))
+        )
+
     async def achat_stream(
         self, prompt: str, history: list | None = None, **kwargs
     ) -> AsyncGenerator[str, None]:
@@ -333,22 +231,30 @@ class AzureOpenAIChatFNLLM:
         -------
             A generator that yields strings representing the response.
         """
-        # Get the tiktoken encoding for the model
-        try:
-            encoding = tiktoken.encoding_for_model(self.config.model)
-        except KeyError:
-            # Fallback to a default encoding if the model is not recognized by tiktoken
-            encoding = tiktoken.get_encoding("cl100k_base")
-        if history is None:
-            response = await self.model(prompt, stream=True, **kwargs)
-        else:
-            response = await self.model(prompt, history=history, stream=True, **kwargs)
-        output_tokens_count = 0
+        if history is not None:
+            kwargs["history"] = history
+        response = await self.model(prompt, stream=True, **kwargs)
+        if not (self._LOG_TOKENS and COST_LOG_ENABLED):
+            async for chunk in response.output.content:
+                if chunk is not None:
+                    yield chunk
+            return
+        chunks: list[str] = []
+        append_chunk = chunks.append
         async for chunk in response.output.content:
             if chunk is not None:
                 yield chunk
-                output_tokens_count += len(encoding.encode(chunk))
-        log_tokens(len(encoding.encode(prompt)),output_tokens_count)
+                append_chunk(chunk)
+        usage = response.output.usage
+        if usage is not None and (usage.input_tokens or usage.output_tokens):
+            log_tokens(usage.input_tokens, usage.output_tokens)
+        else:
+            # The service did not report stream usage, so estimate it locally.
+            encoding = _get_encoding(self.config.model)
+            log_tokens(
+                len(encoding.encode(prompt)),
+                len(encoding.encode("".join(chunks))),
+            )
 
     def chat(self, prompt: str, history: list | None = None, **kwargs) -> ModelResponse:
         """
@@ -382,10 +288,16 @@ class AzureOpenAIChatFNLLM:
         raise NotImplementedError(msg)
 
 
-class AzureOpenAIEmbeddingFNLLM:
-    """An Azure OpenAI Embedding Model provider using the fnllm library."""
+class _BaseEmbeddingFNLLM:
+    """A base Embedding Model provider using the fnllm library."""
+
+    _AZURE: ClassVar[bool] = False
+    """Whether the provider targets Azure OpenAI."""
+    _LOG_TOKENS: ClassVar[bool] = False
+    """Whether to record token usage with log_tokens."""
 
     model: FNLLMEmbeddingLLM
+    client: OpenAIClient
 
     def __init__(
         self,
@@ -395,10 +307,11 @@ class AzureOpenAIEmbeddingFNLLM:
         callbacks: WorkflowCallbacks | None = None,
         cache: PipelineCache | None = None,
     ) -> None:
-        model_config = _create_openai_config(config, azure=True)
+        model_config = _create_openai_config(config, azure=self._AZURE)
         error_handler = _create_error_handler(callbacks) if callbacks else None
         model_cache = _create_cache(cache, name)
         client = create_openai_client(model_config)
+        self.client = client
         self.model = create_openai_embeddings_llm(
             model_config,
             client=client,
@@ -406,6 +319,16 @@ class AzureOpenAIEmbeddingFNLLM:
             events=FNLLMEvents(error_handler) if error_handler else None,
         )
         self.config = config
+        self._model_name = (
+            config.deployment_name or config.model if self._AZURE else config.model
+        )
+        # Deployments of the same name on different endpoints may serve different models
+        self._cache_namespace = "|".join((
+            config.api_base or "",
+            config.api_version or "",
+            self._model_name,
+        ))
+        self._coalescer = EmbeddingCoalescer(self._aembed_batch)
 
     async def aembed_batch(self, text_list: list[str], **kwargs) -> list[list[float]]:
         """
@@ -419,12 +342,86 @@ class AzureOpenAIEmbeddingFNLLM:
         -------
             The embeddings of the text.
         """
+        if kwargs:
+            return await self._aembed_batch(text_list, **kwargs)
+        namespace = self._cache_namespace
+        embeddings = [
+            _embedding_memory_cache.get(namespace, text) for text in text_list
+        ]
+        misses = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if misses:
+            missed_embeddings = await self._aembed_batch(
+                [text_list[i] for i in misses],
+                batch_api=self.config.allow_batch_api,
+            )
+            for i, embedding in zip(misses, missed_embeddings, strict=True):
+                _embedding_memory_cache.set(namespace, text_list[i], embedding)
+                embeddings[i] = embedding
+        return cast("list[list[float]]", embeddings)
+
+    async def _aembed_batch(
+        self, text_list: list[str], *, batch_api: bool = False, **kwargs
+    ) -> list[list[float]]:
+        """Embed the given text using the Model, bypassing the in-memory cache."""
+        unique: dict[str, int] = {}
+        indices = [unique.setdefault(text, len(unique)) for text in text_list]
+        if len(unique) < len(text_list):
+            unique_embeddings = await self._aembed_batch(
+                list(unique), batch_api=batch_api, **kwargs
+            )
+            # Copy so repeated texts do not share one mutable list
+            return [list(unique_embeddings[i]) for i in indices]
+        # Decided on the unique cache misses, which is what a Batch API job would contain
+        if batch_api and len(text_list) >= self.config.batch_api_threshold:
+            return await self._aembed_via_batch(text_list)
+        if len(text_list) < BUCKET_MIN_BATCH_SIZE:
+            return await self._aembed_bucket(text_list, **kwargs)
+        buckets = bucket_by_length(text_list)
+        if len(buckets) == 1:
+            return await self._aembed_bucket(text_list, **kwargs)
+        bucket_embeddings = await asyncio.gather(
+            *(
+                self._aembed_bucket([text_list[i] for i in bucket], **kwargs)
+                for bucket in buckets
+            )
+        )
+        embeddings: list[list[float] | None] = [None] * len(text_list)
+        for bucket, bucket_embedding in zip(buckets, bucket_embeddings, strict=True):
+            for i, embedding in zip(bucket, bucket_embedding, strict=True):
+                embeddings[i] = embedding
+        return cast("list[list[float]]", embeddings)
+
+    async def _aembed_bucket(self, text_list: list[str], **kwargs) -> list[list[float]]:
+        """Embed a group of similarly sized texts in a single Model request."""
         response = await self.model(text_list, **kwargs)
-        log_tokens(embedding_tokens=response.metrics.usage.input_tokens)
-        if response.output.embeddings is None:
+        if self._LOG_TOKENS:
+            log_tokens(embedding_tokens=response.metrics.usage.input_tokens)
+        embeddings = response.output.embeddings
+        if embeddings is None:
             msg = "No embeddings found in response"
             raise ValueError(msg)
-        embeddings: list[list[float]] = response.output.embeddings
+        return embeddings
+
+    async def _aembed_via_batch(self, text_list: list[str]) -> list[list[float]]:
+        """Embed the given text using the OpenAI Batch API, one job per BATCH_MAX_REQUESTS texts."""
+        jobs = await asyncio.gather(
+            *(
+                run_embeddings_batch_job(
+                    self.client,
+                    self._model_name,
+                    text_list[start : start + BATCH_MAX_REQUESTS],
+                    poll_interval=self.config.batch_api_poll_interval,
+                    timeout=self.config.batch_api_timeout,
+                    azure=self._AZURE,
+                )
+                for start in range(0, len(text_list), BATCH_MAX_REQUESTS)
+            )
+        )
+        embeddings: list[list[float]] = []
+        for job_embeddings, prompt_tokens in jobs:
+            if self._LOG_TOKENS:
+                log_tokens(embedding_tokens=prompt_tokens)
+            embeddings.extend(job_embeddings)
         return embeddings
 
     async def aembed(self, text: str, **kwargs) -> list[float]:
@@ -439,13 +436,15 @@ class AzureOpenAIEmbeddingFNLLM:
         -------
             The embeddings of the text.
         """
-        response = await self.model([text], **kwargs)
-        log_tokens(embedding_tokens=response.metrics.usage.input_tokens)
-        if response.output.embeddings is None:
-            msg = "No embeddings found in response"
-            raise ValueError(msg)
-        embeddings: list[float] = response.output.embeddings[0]
-        return embeddings
+        if kwargs:
+            return (await self._aembed_bucket([text], **kwargs))[0]
+        namespace = self._cache_namespace
+        cached = _embedding_memory_cache.get(namespace, text)
+        if cached is not None:
+            return cached
+        embedding = await self._coalescer.embed(text)
+        _embedding_memory_cache.set(namespace, text, embedding)
+        return embedding
 
     def embed_batch(self, text_list: list[str], **kwargs) -> list[list[float]]:
         """
@@ -474,3 +473,25 @@ class AzureOpenAIEmbeddingFNLLM:
             The embeddings of the text.
         """
         return run_coroutine_sync(self.aembed(text, **kwargs))
+
+
+class OpenAIChatFNLLM(_BaseChatFNLLM):
+    """An OpenAI Chat Model provider using the fnllm library."""
+
+
+class OpenAIEmbeddingFNLLM(_BaseEmbeddingFNLLM):
+    """An OpenAI Embedding Model provider using the fnllm library."""
+
+
+class AzureOpenAIChatFNLLM(_BaseChatFNLLM):
+    """An Azure OpenAI Chat LLM provider using the fnllm library."""
+
+    _AZURE = True
+    _LOG_TOKENS = True
+
+
+class AzureOpenAIEmbeddingFNLLM(_BaseEmbeddingFNLLM):
+    """An Azure OpenAI Embedding Model provider using the fnllm library."""
+
+    _AZURE = True
+    _LOG_TOKENS = True
@@ -6,9 +6,11 @@
 from __future__ import annotations
 
 import asyncio
+import json
 import threading
-from typing import TYPE_CHECKING, Any, TypeVar
+from typing import TYPE_CHECKING, Any, TypeVar, cast
 
+import openai
 from fnllm.base.config import JsonStrategy, RetryStrategy
 from fnllm.openai import AzureOpenAIConfig, OpenAIConfig, PublicOpenAIConfig
 from fnllm.openai.types.chat.parameters import OpenAIChatParameters
@@ -17,7 +19,10 @@ import graphrag.config.defaults as defs
 from graphrag.language_model.providers.fnllm.cache import FNLLMCacheProvider
 
 if TYPE_CHECKING:
-    from collections.abc import Coroutine
+    from collections.abc import Awaitable, Callable, Coroutine
+
+    from fnllm.openai.types.client import OpenAIClient
+    from openai.types import Batch
 
     from graphrag.cache.pipeline_cache import PipelineCache
     from graphrag.callbacks.workflow_callbacks import WorkflowCallbacks
@@ -47,7 +52,9 @@ def _create_error_handler(callbacks: WorkflowCallbacks) -> ErrorHandlerFn:
     return on_error
 
 
-def _create_openai_config(config: LanguageModelConfig, azure: bool) -> OpenAIConfig:
+def _create_openai_config(
+    config: LanguageModelConfig, azure: bool, track_stream_usage: bool = False
+) -> OpenAIConfig:
     """Create an OpenAIConfig from a LanguageModelConfig."""
     encoding_model = config.encoding_model
     json_strategy = (
@@ -81,6 +88,7 @@ def _create_openai_config(config: LanguageModelConfig, azure: bool) -> OpenAICon
             encoding=encoding_model,
             deployment=config.deployment_name,
             chat_parameters=chat_parameters,
+            track_stream_usage=track_stream_usage,
         )
     return PublicOpenAIConfig(
         api_key=config.api_key,
@@ -97,6 +105,7 @@ def _create_openai_config(config: LanguageModelConfig, azure: bool) -> OpenAICon
         model=config.model,
         encoding=encoding_model,
         chat_parameters=chat_parameters,
+        track_stream_usage=track_stream_usage,
     )
 
 
@@ -107,6 +116,8 @@ _loop = asyncio.new_event_loop()
 
 _thr = threading.Thread(target=_loop.run_forever, name="Async Runner", daemon=True)
 
+_thr_lock = threading.Lock()
+
 
 def run_coroutine_sync(coroutine: Coroutine[Any, Any, T]) -> T:
     """
@@ -120,11 +131,205 @@ def run_coroutine_sync(coroutine: Coroutine[Any, Any, T]) -> T:
         The result of the coroutine.
     """
     if not _thr.is_alive():
-        _thr.start()
+        with _thr_lock:
+            # Another caller may have started the runner while we waited for the lock.
+            if not _thr.is_alive():
+                _thr.start()
     future = asyncio.run_coroutine_threadsafe(coroutine, _loop)
     return future.result()
 
 
+class EmbeddingCoalescer:
+    """Coalesce concurrent single-text embedding requests into batched requests."""
+
+    def __init__(
+        self,
+        embed_batch: Callable[[list[str]], Awaitable[list[list[float]]]],
+        window: float = 0.01,
+        max_batch_size: int = 16,
+    ):
+        self._embed_batch = embed_batch
+        self._window = window
+        self._max_batch_size = max_batch_size
+        # Requests are grouped per event loop so futures are only resolved on their own loop.
+        self._pending: dict[
+            asyncio.AbstractEventLoop, list[tuple[str, asyncio.Future[list[float]]]]
+        ] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def embed(self, text: str) -> list[float]:
+        """
+        Embed a text as part of the next batch.
+
+        Args:
+            text: The text to embed.
+
+        Returns
+        -------
+            The embedding of the text.
+        """
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[list[float]] = loop.create_future()
+        pending = self._pending.setdefault(loop, [])
+        pending.append((text, future))
+        if len(pending) >= self._max_batch_size:
+            self._flush(loop)
+        elif len(pending) == 1:
+            loop.call_later(self._window, self._flush, loop)
+        return await future
+
+    def _flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        pending = self._pending.pop(loop, None)
+        if pending:
+            task = loop.create_task(self._run(pending))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(
+        self, pending: list[tuple[str, asyncio.Future[list[float]]]]
+    ) -> None:
+        results: list[list[float] | BaseException]
+        try:
+            results = list(await self._embed_batch([text for text, _ in pending]))
+        except Exception as error:  # noqa: BLE001
+            if len(pending) == 1 or not isinstance(error, openai.BadRequestError):
+                # Throttling and service errors would only repeat for each text
+                results = [error] * len(pending)
+            else:
+                # Retry each text alone so one rejected input does not fail the others
+                singles = await asyncio.gather(
+                    *(self._embed_batch([text]) for text, _ in pending),
+                    return_exceptions=True,
+                )
+                results = [
+                    single if isinstance(single, BaseException) else single[0]
+                    for single in singles
+                ]
+        for (_, future), result in zip(pending, results, strict=True):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+BUCKET_MIN_BATCH_SIZE: int = 64  # Smaller batches are sent as one request, unbucketed
+
+
+def bucket_by_length(text_list: list[str], min_length: int = 256) -> list[list[int]]:
+    """
+    Group the indices of the given texts into power-of-two length buckets.
+
+    Args:
+        text_list: The texts to group.
+        min_length: Texts shorter than this share the first bucket.
+
+    Returns
+    -------
+        The indices of the texts in each bucket, shortest bucket first.
+    """
+    buckets: dict[int, list[int]] = {}
+    for i, text in enumerate(text_list):
+        buckets.setdefault(max(len(text), min_length).bit_length(), []).append(i)
+    return [buckets[size] for size in sorted(buckets)]
+
+
+BATCH_EMBEDDINGS_ENDPOINT = "/v1/embeddings"
+AZURE_BATCH_EMBEDDINGS_ENDPOINT = "/embeddings"
+BATCH_MAX_REQUESTS = 50_000
+BATCH_TERMINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+
+async def run_embeddings_batch_job(
+    client: OpenAIClient,
+    model: str,
+    text_list: list[str],
+    *,
+    poll_interval: float,
+    timeout: float,
+    azure: bool = False,
+) -> tuple[list[list[float]], int]:
+    """
+    Embed the given texts through the OpenAI Batch API.
+
+    Args:
+        client: The OpenAI client to submit the batch with.
+        model: The model (or Azure deployment) name to embed with.
+        text_list: The texts to embed, at most BATCH_MAX_REQUESTS of them.
+        poll_interval: The number of seconds to wait between status checks.
+        timeout: The number of seconds to wait for the batch before cancelling it.
+        azure: Whether the client targets Azure OpenAI.
+
+    Returns
+    -------
+        The embeddings, in the order of text_list, and the number of prompt tokens billed.
+    """
+    endpoint = AZURE_BATCH_EMBEDDINGS_ENDPOINT if azure else BATCH_EMBEDDINGS_ENDPOINT
+    requests = "\n".join(
+        json.dumps({
+            "custom_id": str(i),
+            "method": "POST",
+            "url": endpoint,
+            "body": {"model": model, "input": text},
+        })
+        for i, text in enumerate(text_list)
+    )
+    input_file = await client.files.create(
+        file=("embeddings.jsonl", requests.encode("utf-8")), purpose="batch"
+    )
+    batch = await client.batches.create(
+        input_file_id=input_file.id,
+        endpoint=cast("Any", endpoint),
+        completion_window="24h",
+    )
+    try:
+        batch = await asyncio.wait_for(
+            _wait_for_batch(client, batch.id, poll_interval), timeout
+        )
+    except asyncio.TimeoutError:
+        await client.batches.cancel(batch.id)
+        msg = f"Embedding batch {batch.id} did not finish within {timeout} seconds"
+        raise TimeoutError(msg) from None
+    except asyncio.CancelledError:
+        await client.batches.cancel(batch.id)
+        raise
+    if batch.status != "completed" or batch.output_file_id is None:
+        msg = f"Embedding batch {batch.id} finished with status {batch.status}"
+        raise ValueError(msg)
+
+    output = await client.files.content(batch.output_file_id)
+    embeddings: list[list[float] | None] = [None] * len(text_list)
+    prompt_tokens = 0
+    for line in output.text.splitlines():
+        if not line:
+            continue
+        result = json.loads(line)
+        response = result.get("response") or {}
+        if result.get("error") or response.get("status_code") != 200:
+            continue
+        body = response["body"]
+        embeddings[int(result["custom_id"])] = body["data"][0]["embedding"]
+        prompt_tokens += body.get("usage", {}).get("prompt_tokens", 0)
+
+    missing = sum(1 for embedding in embeddings if embedding is None)
+    if missing:
+        msg = f"Embedding batch {batch.id} returned no embeddings for {missing} of {len(text_list)} inputs"
+        raise ValueError(msg)
+    return cast("list[list[float]]", embeddings), prompt_tokens
+
+
+async def _wait_for_batch(
+    client: OpenAIClient, batch_id: str, poll_interval: float
+) -> Batch:
+    """Poll a batch until it reaches a terminal status."""
+    while True:
+        batch = await client.batches.retrieve(batch_id)
+        if batch.status in BATCH_TERMINAL_STATUSES:
+            return batch
+        await asyncio.sleep(poll_interval)
+
+
 def is_reasoning_model(model: str) -> bool:
     """Return whether the model uses a known OpenAI reasoning model."""
     return model.lower() in {"o1", "o1-mini", "o3-mini"}
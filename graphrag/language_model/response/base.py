@@ -3,9 +3,10 @@
 
 """Base llm response protocol."""
 
+from dataclasses import dataclass, field
 from typing import Any, Generic, Protocol, TypeVar
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel
 
 T = TypeVar("T", bound=BaseModel, covariant=True)
 
@@ -43,27 +44,51 @@ class ModelResponse(Protocol, Generic[T]):
         ...
 
 
-class BaseModelOutput(BaseModel):
+@dataclass(slots=True, frozen=True, init=False)
+class BaseModelOutput:
     """Base class for LLM output."""
 
-    content: str = Field(..., description="The textual content of the output.")
+    content: str
     """The textual content of the output."""
-    full_response: dict[str, Any] | None = Field(
-        None, description="The complete JSON response returned by the LLM provider."
+    # Excluded from eq/hash: both change when full_response is first read
+    _full_response: dict[str, Any] | None = field(
+        default=None, repr=False, compare=False
     )
-    """The complete JSON response returned by the LLM provider."""
+    _raw_model: Any | None = field(default=None, repr=False, compare=False)
+
+    def __init__(
+        self,
+        content: str,
+        full_response: dict[str, Any] | None = None,
+        raw_model: Any | None = None,
+    ) -> None:
+        object.__setattr__(self, "content", content)
+        object.__setattr__(self, "_full_response", full_response)
+        object.__setattr__(self, "_raw_model", raw_model)
+
+    @property
+    def full_response(self) -> dict[str, Any] | None:
+        """The complete JSON response returned by the LLM provider.
+
+        When built from a raw provider model, it is converted with to_dict() on first access.
+        """
+        if self._full_response is None and self._raw_model is not None:
+            object.__setattr__(self, "_full_response", self._raw_model.to_dict())
+            object.__setattr__(self, "_raw_model", None)
+        return self._full_response
 
 
-class BaseModelResponse(BaseModel, Generic[T]):
+@dataclass(slots=True, frozen=True)
+class BaseModelResponse(Generic[T]):
     """Base class for a Model response."""
 
     output: BaseModelOutput
     """"""
     parsed_response: T | None = None
     """Parsed response."""
-    history: list[Any] = Field(default_factory=list)
+    history: list[Any] = field(default_factory=list)
     """History of the response."""
-    tool_calls: list = Field(default_factory=list)
+    tool_calls: list = field(default_factory=list)
     """Tool calls required by the Model. These will be instances of the LLM tools (with filled parameters)."""
     metrics: Any | None = None
     """Request/response metrics."""
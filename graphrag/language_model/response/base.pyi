@@ -1,6 +1,7 @@
 # Copyright (c) 2025 Microsoft Corporation.
 # Licensed under the MIT License
 
+from dataclasses import dataclass
 from typing import Any, Generic, Protocol, TypeVar
 
 from pydantic import BaseModel
@@ -21,30 +22,24 @@ class ModelResponse(Protocol, Generic[_T]):
     @property
     def history(self) -> list[Any]: ...
 
-class BaseModelOutput(BaseModel):
+@dataclass(slots=True, frozen=True, init=False)
+class BaseModelOutput:
     content: str
-    full_response: dict[str, Any] | None
 
     def __init__(
         self,
         content: str,
         full_response: dict[str, Any] | None = None,
+        raw_model: Any | None = None,
     ) -> None: ...
+    @property
+    def full_response(self) -> dict[str, Any] | None: ...
 
-class BaseModelResponse(BaseModel, Generic[_T]):
+@dataclass(slots=True, frozen=True)
+class BaseModelResponse(Generic[_T]):
     output: BaseModelOutput
-    parsed_response: _T | None
-    history: list[Any]
-    tool_calls: list[Any]
-    metrics: Any | None
-    cache_hit: bool | None
-
-    def __init__(
-        self,
-        output: BaseModelOutput,
-        parsed_response: _T | None = None,
-        history: list[Any] = ...,  # default provided by Pydantic
-        tool_calls: list[Any] = ...,  # default provided by Pydantic
-        metrics: Any | None = None,
-        cache_hit: bool | None = None,
-    ) -> None: ...
+    parsed_response: _T | None = None
+    history: list[Any] = ...
+    tool_calls: list[Any] = ...
+    metrics: Any | None = None
+    cache_hit: bool | None = None
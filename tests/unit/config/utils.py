@@ -93,6 +93,10 @@ def assert_language_model_configs(
     assert actual.max_retry_wait == expected.max_retry_wait
     assert actual.concurrent_requests == expected.concurrent_requests
     assert actual.async_mode == expected.async_mode
+    assert actual.allow_batch_api == expected.allow_batch_api
+    assert actual.batch_api_threshold == expected.batch_api_threshold
+    assert actual.batch_api_poll_interval == expected.batch_api_poll_interval
+    assert actual.batch_api_timeout == expected.batch_api_timeout
     if actual.responses is not None:
         assert expected.responses is not None
         assert len(actual.responses) == len(expected.responses)
@@ -0,0 +1,73 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+import importlib
+from unittest.mock import Mock
+
+import pandas as pd
+import pytest
+
+from graphrag.index.operations.embed_text.strategies.typing import (
+    TextEmbeddingResult,
+)
+
+# The package re-exports the embed_text function under the module's name
+embed_text_module = importlib.import_module(
+    "graphrag.index.operations.embed_text.embed_text"
+)
+
+
+class FakeStrategy:
+    """Embeds each text as a one-element vector of its length, recording each call."""
+
+    def __init__(self):
+        self.calls: list[list[str]] = []
+
+    async def __call__(self, texts, callbacks, cache, args):
+        self.calls.append(list(texts))
+        return TextEmbeddingResult(embeddings=[[float(len(t))] for t in texts])
+
+
+@pytest.fixture
+def strategy(monkeypatch) -> FakeStrategy:
+    fake = FakeStrategy()
+    monkeypatch.setattr(embed_text_module, "load_strategy", lambda strategy: fake)
+    return fake
+
+
+async def _embed(strategy_config: dict) -> tuple[list, Mock]:
+    input = pd.DataFrame({"id": ["1", "2", "3"], "text": ["a", "bb", "ccc"]})
+    vector_store = Mock()
+    results = await embed_text_module._text_embed_with_vector_store(  # noqa: SLF001
+        input=input,
+        callbacks=Mock(),
+        cache=Mock(),
+        embed_column="text",
+        strategy=strategy_config,
+        vector_store=vector_store,
+        vector_store_config={"batch_size": 2},
+    )
+    return results, vector_store
+
+
+async def test_text_embed_with_vector_store_embeds_per_insert_batch(strategy):
+    results, vector_store = await _embed({"type": "openai", "llm": {}})
+
+    assert results == [[1.0], [2.0], [3.0]]
+    assert strategy.calls == [["a", "bb"], ["ccc"]]
+    assert vector_store.load_documents.call_count == 2
+
+
+async def test_text_embed_with_vector_store_embeds_all_rows_for_batch_api(strategy):
+    results, vector_store = await _embed({
+        "type": "openai",
+        "llm": {"allow_batch_api": True},
+    })
+
+    assert results == [[1.0], [2.0], [3.0]]
+    assert strategy.calls == [["a", "bb", "ccc"]]
+    loaded = [call.args[0] for call in vector_store.load_documents.call_args_list]
+    assert [[document.vector for document in documents] for documents in loaded] == [
+        [[1.0], [2.0]],
+        [[3.0]],
+    ]
@@ -0,0 +1,135 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from graphrag.language_model.providers.fnllm.utils import run_embeddings_batch_job
+
+
+class FakeBatchClient:
+    """A stand-in for the files and batches APIs of an OpenAI client."""
+
+    def __init__(self, statuses: list[str], output_lines: list[dict] | None = None):
+        self.statuses = statuses
+        self.output_lines = output_lines or []
+        self.uploaded: list[dict] = []
+        self.created: dict = {}
+        self.cancelled: list[str] = []
+        self.files = SimpleNamespace(create=self._create_file, content=self._content)
+        self.batches = SimpleNamespace(
+            create=self._create_batch,
+            retrieve=self._retrieve_batch,
+            cancel=self._cancel_batch,
+        )
+
+    async def _create_file(self, file, purpose):
+        assert purpose == "batch"
+        self.uploaded = [json.loads(line) for line in file[1].decode().splitlines()]
+        return SimpleNamespace(id="file-in")
+
+    async def _create_batch(self, **kwargs):
+        self.created = kwargs
+        return SimpleNamespace(id="batch-1", status="validating", output_file_id=None)
+
+    async def _retrieve_batch(self, batch_id):
+        status = self.statuses.pop(0) if len(self.statuses) > 1 else self.statuses[0]
+        output_file_id = "file-out" if status == "completed" else None
+        return SimpleNamespace(
+            id=batch_id, status=status, output_file_id=output_file_id
+        )
+
+    async def _cancel_batch(self, batch_id):
+        self.cancelled.append(batch_id)
+
+    async def _content(self, file_id):
+        assert file_id == "file-out"
+        return SimpleNamespace(
+            text="\n".join(json.dumps(line) for line in self.output_lines)
+        )
+
+
+def _output_line(custom_id: str, embedding: list[float], tokens: int = 1) -> dict:
+    return {
+        "custom_id": custom_id,
+        "response": {
+            "status_code": 200,
+            "body": {
+                "data": [{"embedding": embedding}],
+                "usage": {"prompt_tokens": tokens},
+            },
+        },
+        "error": None,
+    }
+
+
+async def test_run_embeddings_batch_job_builds_requests_and_orders_results():
+    client = FakeBatchClient(
+        ["in_progress", "completed"],
+        [_output_line("1", [1.0], 3), _output_line("0", [0.0], 2)],
+    )
+
+    embeddings, prompt_tokens = await run_embeddings_batch_job(
+        client, "text-embedding-3-small", ["a", "b"], poll_interval=0, timeout=5
+    )
+
+    assert embeddings == [[0.0], [1.0]]
+    assert prompt_tokens == 5
+    assert client.uploaded == [
+        {
+            "custom_id": "0",
+            "method": "POST",
+            "url": "/v1/embeddings",
+            "body": {"model": "text-embedding-3-small", "input": "a"},
+        },
+        {
+            "custom_id": "1",
+            "method": "POST",
+            "url": "/v1/embeddings",
+            "body": {"model": "text-embedding-3-small", "input": "b"},
+        },
+    ]
+    assert client.created["endpoint"] == "/v1/embeddings"
+    assert client.created["input_file_id"] == "file-in"
+
+
+async def test_run_embeddings_batch_job_uses_azure_endpoint():
+    client = FakeBatchClient(["completed"], [_output_line("0", [0.0])])
+
+    await run_embeddings_batch_job(
+        client, "my-deployment", ["a"], poll_interval=0, timeout=5, azure=True
+    )
+
+    assert client.uploaded[0]["url"] == "/embeddings"
+    assert client.uploaded[0]["body"]["model"] == "my-deployment"
+    assert client.created["endpoint"] == "/embeddings"
+
+
+async def test_run_embeddings_batch_job_raises_on_failed_batch():
+    client = FakeBatchClient(["failed"])
+
+    with pytest.raises(ValueError, match="finished with status failed"):
+        await run_embeddings_batch_job(client, "m", ["a"], poll_interval=0, timeout=5)
+
+
+async def test_run_embeddings_batch_job_raises_on_missing_output():
+    error_line = {"custom_id": "1", "response": None, "error": {"code": "bad"}}
+    client = FakeBatchClient(["completed"], [_output_line("0", [0.0]), error_line])
+
+    with pytest.raises(ValueError, match="no embeddings for 1 of 2 inputs"):
+        await run_embeddings_batch_job(
+            client, "m", ["a", "b"], poll_interval=0, timeout=5
+        )
+
+
+async def test_run_embeddings_batch_job_cancels_on_timeout():
+    client = FakeBatchClient(["in_progress"])
+
+    with pytest.raises(TimeoutError):
+        await run_embeddings_batch_job(
+            client, "m", ["a"], poll_interval=0.01, timeout=0.05
+        )
+
+    assert client.cancelled == ["batch-1"]
@@ -0,0 +1,83 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+from graphrag.language_model.providers.fnllm.cache import EmbeddingMemoryCache
+
+
+def test_embedding_memory_cache_get_and_set():
+    cache = EmbeddingMemoryCache(max_bytes=1024)
+    assert cache.get("model", "text") is None
+
+    cache.set("model", "text", [0.5, 0.25])
+
+    assert cache.get("model", "text") == [0.5, 0.25]
+    assert cache.get("other-model", "text") is None
+    assert cache.get("model", "other text") is None
+
+
+def test_embedding_memory_cache_stores_float32():
+    cache = EmbeddingMemoryCache(max_bytes=1024)
+
+    cache.set("model", "text", [0.1])
+
+    cached = cache.get("model", "text")
+    assert cached is not None
+    assert cached != [0.1]
+    assert abs(cached[0] - 0.1) < 1e-7
+
+
+def test_embedding_memory_cache_returns_copies():
+    cache = EmbeddingMemoryCache(max_bytes=1024)
+    embedding = [0.5, 0.25]
+    cache.set("model", "text", embedding)
+
+    embedding.append(0.125)
+    first = cache.get("model", "text")
+    assert first == [0.5, 0.25]
+    assert first is not None
+    first.append(0.75)
+
+    assert cache.get("model", "text") == [0.5, 0.25]
+
+
+def test_embedding_memory_cache_evicts_least_recently_used_by_size():
+    # Each one-dimensional float32 entry takes 4 bytes
+    cache = EmbeddingMemoryCache(max_bytes=8)
+    cache.set("model", "a", [1.0])
+    cache.set("model", "b", [2.0])
+    cache.get("model", "a")
+
+    cache.set("model", "c", [3.0])
+
+    assert cache.get("model", "a") == [1.0]
+    assert cache.get("model", "b") is None
+    assert cache.get("model", "c") == [3.0]
+
+
+def test_embedding_memory_cache_replacing_an_entry_keeps_the_size():
+    cache = EmbeddingMemoryCache(max_bytes=8)
+    cache.set("model", "a", [1.0])
+    cache.set("model", "a", [1.5])
+    cache.set("model", "b", [2.0])
+
+    assert cache.get("model", "a") == [1.5]
+    assert cache.get("model", "b") == [2.0]
+
+
+def test_embedding_memory_cache_skips_entries_larger_than_the_cache():
+    cache = EmbeddingMemoryCache(max_bytes=8)
+    cache.set("model", "a", [1.0])
+
+    cache.set("model", "big", [1.0, 2.0, 3.0])
+
+    assert cache.get("model", "big") is None
+    assert cache.get("model", "a") == [1.0]
+
+
+def test_embedding_memory_cache_clear():
+    cache = EmbeddingMemoryCache(max_bytes=8)
+    cache.set("model", "a", [1.0])
+
+    cache.clear()
+
+    assert cache.get("model", "a") is None
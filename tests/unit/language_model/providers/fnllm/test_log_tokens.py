@@ -0,0 +1,64 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+from pathlib import Path
+
+import pytest
+
+import graphrag.language_model.providers.fnllm.models as models
+
+
+@pytest.fixture
+def usage_log(monkeypatch, tmp_path) -> Path:
+    path = tmp_path / "token_usage.log"
+    monkeypatch.setattr(models, "COST_LOG_ENABLED", True)
+    monkeypatch.setattr(models, "USAGE_LOG_PATH", str(path))
+    monkeypatch.setattr(models, "USAGE_LOG_BUFFER_SIZE", 1)
+    monkeypatch.setattr(models, "_usage_log_file", None)
+    monkeypatch.setattr(models, "_running_cost_nano_usd", 0)
+    monkeypatch.setattr(models, "_log_tokens_calls", 0)
+    yield path
+    if models._usage_log_file is not None:  # noqa: SLF001
+        models._usage_log_file.close()  # noqa: SLF001
+
+
+def test_log_tokens_writes_usage_lines(usage_log):
+    models.log_tokens(10, 5)
+    models.log_tokens(embedding_tokens=100)
+
+    assert usage_log.read_text() == "10,5,0\n0,0,100\n"
+
+
+def test_log_tokens_tracks_cost_in_nano_usd(usage_log):
+    models.log_tokens(1_000_000, 1_000_000, 1_000_000)
+
+    # 1M tokens each at 5, 15 and 0.02 USD per million tokens
+    assert models._running_cost_nano_usd == 20_020_000_000  # noqa: SLF001
+
+
+def test_log_tokens_checks_budget_every_interval(usage_log):
+    over_budget_tokens = 10_000_001  # 50.000005 USD of input tokens
+    models.log_tokens(over_budget_tokens)
+    for _ in range(models.COST_CHECK_INTERVAL - 2):
+        models.log_tokens()
+
+    with pytest.raises(Exception, match=r"Estimated cost exceeded 50\.0 USD"):
+        models.log_tokens()
+
+    assert len(usage_log.read_text().splitlines()) == models.COST_CHECK_INTERVAL
+
+
+def test_log_tokens_does_not_raise_within_budget(usage_log):
+    for _ in range(models.COST_CHECK_INTERVAL):
+        models.log_tokens(1000, 1000)
+
+
+def test_log_tokens_is_a_no_op_when_disabled(usage_log, monkeypatch):
+    monkeypatch.setattr(models, "COST_LOG_ENABLED", False)
+
+    for _ in range(models.COST_CHECK_INTERVAL):
+        models.log_tokens(100_000_000, 100_000_000, 100_000_000)
+
+    assert not usage_log.exists()
+    assert models._usage_log_file is None  # noqa: SLF001
+    assert models._running_cost_nano_usd == 0  # noqa: SLF001
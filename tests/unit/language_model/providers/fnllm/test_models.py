@@ -0,0 +1,290 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import graphrag.language_model.providers.fnllm.models as models
+from graphrag.config.enums import ModelType
+from graphrag.config.models.language_model_config import LanguageModelConfig
+from graphrag.language_model.providers.fnllm.cache import EmbeddingMemoryCache
+
+
+class FakeEmbeddingModel:
+    """Embeds each text as a one-element vector of its length, recording each call."""
+
+    def __init__(self):
+        self.calls: list[list[str]] = []
+
+    async def __call__(self, text_list: list[str], **kwargs):
+        self.calls.append(list(text_list))
+        return SimpleNamespace(
+            output=SimpleNamespace(embeddings=[[float(len(t))] for t in text_list]),
+            metrics=SimpleNamespace(usage=SimpleNamespace(input_tokens=0)),
+        )
+
+
+@pytest.fixture
+def fake_model(monkeypatch) -> FakeEmbeddingModel:
+    fake = FakeEmbeddingModel()
+    monkeypatch.setattr(
+        models, "create_openai_embeddings_llm", lambda *args, **kwargs: fake
+    )
+    monkeypatch.setattr(
+        models, "_embedding_memory_cache", EmbeddingMemoryCache(1 << 20)
+    )
+    return fake
+
+
+def _create_provider(
+    api_base: str | None = None, **kwargs
+) -> models.OpenAIEmbeddingFNLLM:
+    config = LanguageModelConfig(
+        type=ModelType.OpenAIEmbedding,
+        model="text-embedding-3-small",
+        api_key="test",
+        api_base=api_base,
+        **kwargs,
+    )
+    return models.OpenAIEmbeddingFNLLM(name="test", config=config)
+
+
+async def test_aembed_batch_only_embeds_cache_misses(fake_model):
+    provider = _create_provider()
+    assert await provider.aembed_batch(["a", "bb"]) == [[1.0], [2.0]]
+
+    embeddings = await provider.aembed_batch(["bb", "ccc", "a"])
+
+    assert embeddings == [[2.0], [3.0], [1.0]]
+    assert fake_model.calls == [["a", "bb"], ["ccc"]]
+
+
+async def test_aembed_batch_embeds_repeated_texts_once(fake_model):
+    provider = _create_provider()
+
+    embeddings = await provider.aembed_batch(["a", "bb", "a"])
+
+    assert embeddings == [[1.0], [2.0], [1.0]]
+    assert embeddings[0] is not embeddings[2]
+    assert fake_model.calls == [["a", "bb"]]
+
+
+async def test_aembed_coalesces_repeated_texts_into_independent_lists(fake_model):
+    provider = _create_provider()
+
+    first, second = await asyncio.gather(provider.aembed("w"), provider.aembed("w"))
+
+    assert first == second == [1.0]
+    assert first is not second
+    assert fake_model.calls == [["w"]]
+
+
+async def test_aembed_batch_returns_independent_cached_lists(fake_model):
+    provider = _create_provider()
+    first = await provider.aembed_batch(["a"])
+    first[0].append(9.0)
+
+    second = await provider.aembed_batch(["a"])
+    second[0].append(8.0)
+
+    assert await provider.aembed_batch(["a"]) == [[1.0]]
+    assert fake_model.calls == [["a"]]
+
+
+async def test_aembed_batch_does_not_share_cache_across_endpoints(fake_model):
+    await _create_provider("https://one.example.com").aembed_batch(["a"])
+    await _create_provider("https://two.example.com").aembed_batch(["a"])
+
+    assert fake_model.calls == [["a"], ["a"]]
+
+
+async def test_aembed_batch_sends_small_batches_as_one_request(fake_model):
+    provider = _create_provider()
+
+    embeddings = await provider.aembed_batch(["q", "w" * 1000])
+
+    assert embeddings == [[1.0], [1000.0]]
+    assert fake_model.calls == [["q", "w" * 1000]]
+
+
+async def test_aembed_batch_buckets_large_batches_and_restores_order(fake_model):
+    provider = _create_provider()
+    text_list = [("x" * 1000 if i % 2 else "y" * (i + 1)) + str(i) for i in range(64)]
+
+    embeddings = await provider.aembed_batch(text_list)
+
+    assert embeddings == [[float(len(text))] for text in text_list]
+    assert len(fake_model.calls) == 2
+    assert sorted(text for call in fake_model.calls for text in call) == sorted(
+        text_list
+    )
+
+
+async def test_aembed_batch_uses_batch_api_for_enough_cache_misses(
+    fake_model, monkeypatch
+):
+    batch_jobs: list[list[str]] = []
+
+    async def run_batch_job(client, model, text_list, **kwargs):  # noqa: RUF029
+        batch_jobs.append(list(text_list))
+        return [[float(len(text))] for text in text_list], 0
+
+    monkeypatch.setattr(models, "run_embeddings_batch_job", run_batch_job)
+    provider = _create_provider(allow_batch_api=True, batch_api_threshold=4)
+
+    assert await provider.aembed_batch(["a", "b", "c"]) == [[1.0], [1.0], [1.0]]
+    assert await provider.aembed_batch(["a", "b", "c", "zz"]) == [
+        [1.0],
+        [1.0],
+        [1.0],
+        [2.0],
+    ]
+    assert await provider.aembed_batch(["w", "x", "w", "x"]) == [[1.0]] * 4
+
+    assert fake_model.calls == [["a", "b", "c"], ["zz"], ["w", "x"]]
+    assert batch_jobs == []
+
+    assert await provider.aembed_batch(["d", "e", "f", "g"]) == [[1.0]] * 4
+    assert batch_jobs == [["d", "e", "f", "g"]]
+
+
+class FakeChatModel:
+    """Streams each prompt back word by word, reporting the given stream usage."""
+
+    def __init__(self, usage: SimpleNamespace | None = None):
+        self.usage = usage
+        self.calls: list[tuple[str, dict]] = []
+
+    async def __call__(self, prompt: str, **kwargs):
+        self.calls.append((prompt, kwargs))
+
+        async def content():
+            for word in prompt.split():
+                await asyncio.sleep(0)
+                yield word
+
+        return SimpleNamespace(
+            output=SimpleNamespace(content=content(), usage=self.usage)
+        )
+
+
+class FakeEncoding:
+    """Counts each character as a token."""
+
+    def encode(self, text: str) -> list[str]:
+        return list(text)
+
+
+def _create_azure_chat_provider(
+    monkeypatch, fake: FakeChatModel, model_configs: list | None = None
+) -> models.AzureOpenAIChatFNLLM:
+    def create_chat_llm(model_config, **kwargs):
+        if model_configs is not None:
+            model_configs.append(model_config)
+        return fake
+
+    monkeypatch.setattr(models, "create_openai_chat_llm", create_chat_llm)
+    config = LanguageModelConfig(
+        type=ModelType.AzureOpenAIChat,
+        model="gpt-4o",
+        api_key="test",
+        api_base="https://example.openai.azure.com",
+        api_version="2024-02-15-preview",
+        deployment_name="gpt-4o",
+    )
+    return models.AzureOpenAIChatFNLLM(name="test", config=config)
+
+
+async def _collect(stream) -> list[str]:
+    return [chunk async for chunk in stream]
+
+
+@pytest.fixture
+def logged_tokens(monkeypatch) -> list[tuple]:
+    calls: list[tuple] = []
+    monkeypatch.setattr(models, "log_tokens", lambda *args: calls.append(args))
+    monkeypatch.setattr(models, "_get_encoding", lambda model: FakeEncoding())
+    return calls
+
+
+async def test_achat_stream_skips_usage_when_cost_log_disabled(
+    monkeypatch, logged_tokens
+):
+    monkeypatch.setattr(models, "COST_LOG_ENABLED", False)
+    model_configs: list = []
+    provider = _create_azure_chat_provider(monkeypatch, FakeChatModel(), model_configs)
+
+    assert await _collect(provider.achat_stream("one two")) == ["one", "two"]
+
+    assert model_configs[0].track_stream_usage is False
+    assert logged_tokens == []
+
+
+async def test_achat_stream_logs_reported_usage(monkeypatch, logged_tokens):
+    monkeypatch.setattr(models, "COST_LOG_ENABLED", True)
+    model_configs: list = []
+    usage = SimpleNamespace(input_tokens=7, output_tokens=3)
+    provider = _create_azure_chat_provider(
+        monkeypatch, FakeChatModel(usage), model_configs
+    )
+
+    assert await _collect(provider.achat_stream("one two")) == ["one", "two"]
+
+    assert model_configs[0].track_stream_usage is True
+    assert logged_tokens == [(7, 3)]
+
+
+async def test_achat_stream_estimates_usage_when_not_reported(
+    monkeypatch, logged_tokens
+):
+    monkeypatch.setattr(models, "COST_LOG_ENABLED", True)
+    provider = _create_azure_chat_provider(monkeypatch, FakeChatModel(usage=None))
+
+    assert await _collect(provider.achat_stream("one two three")) == [
+        "one",
+        "two",
+        "three",
+    ]
+
+    assert logged_tokens == [(len("one two three"), len("onetwothree"))]
+
+
+class FakeChatResponder:
+    """Answers each prompt in upper case, finishing shorter prompts later."""
+
+    def __init__(self):
+        self.calls: list[tuple[str, dict]] = []
+
+    async def __call__(self, prompt: str, **kwargs):
+        self.calls.append((prompt, kwargs))
+        await asyncio.sleep(0.01 / len(prompt))
+        return SimpleNamespace(
+            output=SimpleNamespace(content=prompt.upper(), raw_model=None),
+            parsed_json=None,
+            history=[],
+            cache_hit=False,
+            tool_calls=[],
+            metrics=None,
+        )
+
+
+async def test_achat_many_returns_responses_in_prompt_order(monkeypatch):
+    fake = FakeChatResponder()
+    monkeypatch.setattr(models, "create_openai_chat_llm", lambda *args, **kwargs: fake)
+    provider = models.OpenAIChatFNLLM(
+        name="test",
+        config=LanguageModelConfig(
+            type=ModelType.OpenAIChat, model="gpt-4o", api_key="test"
+        ),
+    )
+
+    responses = await provider.achat_many(["a", "bb", "ccc"], json=True)
+
+    assert [response.output.content for response in responses] == ["A", "BB", "CCC"]
+    assert sorted(fake.calls) == [
+        ("a", {"json": True}),
+        ("bb", {"json": True}),
+        ("ccc", {"json": True}),
+    ]
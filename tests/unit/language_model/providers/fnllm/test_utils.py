@@ -0,0 +1,152 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+import asyncio
+import threading
+
+import httpx
+import openai
+import pytest
+
+from graphrag.language_model.providers.fnllm.utils import (
+    EmbeddingCoalescer,
+    bucket_by_length,
+)
+
+
+class FakeEmbedBatch:
+    """Embeds each text as a one-element vector of its length, recording each call."""
+
+    def __init__(self, fail_on: str | None = None, error: type[Exception] = ValueError):
+        self.fail_on = fail_on
+        self.error = error
+        self.calls: list[list[str]] = []
+        self.loops: list[asyncio.AbstractEventLoop] = []
+
+    async def __call__(self, text_list: list[str]) -> list[list[float]]:
+        self.calls.append(list(text_list))
+        self.loops.append(asyncio.get_running_loop())
+        if self.fail_on in text_list:
+            msg = f"cannot embed {self.fail_on}"
+            if self.error is openai.BadRequestError:
+                request = httpx.Request("POST", "https://example.com/embeddings")
+                raise openai.BadRequestError(
+                    msg, response=httpx.Response(400, request=request), body=None
+                )
+            raise self.error(msg)
+        return [[float(len(text))] for text in text_list]
+
+
+async def test_embedding_coalescer_flushes_after_window():
+    embed_batch = FakeEmbedBatch()
+    coalescer = EmbeddingCoalescer(embed_batch, window=0.01, max_batch_size=16)
+
+    embeddings = await asyncio.gather(
+        coalescer.embed("a"), coalescer.embed("bb"), coalescer.embed("ccc")
+    )
+
+    assert embeddings == [[1.0], [2.0], [3.0]]
+    assert embed_batch.calls == [["a", "bb", "ccc"]]
+
+
+async def test_embedding_coalescer_flushes_when_full():
+    embed_batch = FakeEmbedBatch()
+    coalescer = EmbeddingCoalescer(embed_batch, window=60, max_batch_size=2)
+
+    embeddings = await asyncio.wait_for(
+        asyncio.gather(coalescer.embed("a"), coalescer.embed("bb")), timeout=5
+    )
+
+    assert embeddings == [[1.0], [2.0]]
+    assert embed_batch.calls == [["a", "bb"]]
+
+
+def test_embedding_coalescer_groups_requests_per_event_loop():
+    embed_batch = FakeEmbedBatch()
+    coalescer = EmbeddingCoalescer(embed_batch, window=0.05, max_batch_size=16)
+    results: dict[str, list[list[float]]] = {}
+
+    async def embed_all(prefix: str) -> None:
+        texts = [prefix + "x" * n for n in range(3)]
+        results[prefix] = list(
+            await asyncio.gather(*(coalescer.embed(text) for text in texts))
+        )
+
+    threads = [
+        threading.Thread(target=asyncio.run, args=(embed_all(prefix),))
+        for prefix in ("a", "b")
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {"a": [[1.0], [2.0], [3.0]], "b": [[1.0], [2.0], [3.0]]}
+    assert sorted(embed_batch.calls) == [["a", "ax", "axx"], ["b", "bx", "bxx"]]
+    assert embed_batch.loops[0] is not embed_batch.loops[1]
+
+
+async def test_embedding_coalescer_isolates_rejected_texts():
+    embed_batch = FakeEmbedBatch(fail_on="bad", error=openai.BadRequestError)
+    coalescer = EmbeddingCoalescer(embed_batch, window=0.01, max_batch_size=16)
+
+    results = await asyncio.gather(
+        coalescer.embed("a"),
+        coalescer.embed("bad"),
+        coalescer.embed("ccc"),
+        return_exceptions=True,
+    )
+
+    assert results[0] == [1.0]
+    assert isinstance(results[1], openai.BadRequestError)
+    assert results[2] == [3.0]
+    assert embed_batch.calls == [["a", "bad", "ccc"], ["a"], ["bad"], ["ccc"]]
+
+
+async def test_embedding_coalescer_raises_other_errors_on_every_text():
+    embed_batch = FakeEmbedBatch(fail_on="bad", error=RuntimeError)
+    coalescer = EmbeddingCoalescer(embed_batch, window=0.01, max_batch_size=16)
+
+    results = await asyncio.gather(
+        coalescer.embed("a"),
+        coalescer.embed("bad"),
+        coalescer.embed("ccc"),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert embed_batch.calls == [["a", "bad", "ccc"]]
+
+
+async def test_embedding_coalescer_raises_single_text_failure():
+    embed_batch = FakeEmbedBatch(fail_on="bad")
+    coalescer = EmbeddingCoalescer(embed_batch, window=0.01, max_batch_size=16)
+
+    with pytest.raises(ValueError, match="cannot embed bad"):
+        await coalescer.embed("bad")
+
+    assert embed_batch.calls == [["bad"]]
+
+
+def test_bucket_by_length_groups_short_texts_together():
+    assert bucket_by_length(["a", "b" * 100, "c" * 255]) == [[0, 1, 2]]
+
+
+def test_bucket_by_length_groups_by_power_of_two():
+    text_list = ["a" * 600, "b", "c" * 300, "d" * 2000, "e" * 500]
+
+    assert bucket_by_length(text_list) == [[1, 2, 4], [0], [3]]
+
+
+def test_bucket_by_length_covers_every_index_once():
+    text_list = ["x" * n for n in range(0, 5000, 37)]
+
+    buckets = bucket_by_length(text_list)
+
+    assert sorted(i for bucket in buckets for i in bucket) == list(
+        range(len(text_list))
+    )
+
+
+def test_bucket_by_length_empty():
+    assert bucket_by_length([]) == []
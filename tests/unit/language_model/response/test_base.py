@@ -0,0 +1,70 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+from dataclasses import FrozenInstanceError
+
+import pytest
+
+from graphrag.language_model.response.base import BaseModelOutput, BaseModelResponse
+
+
+class FakeRawModel:
+    """A provider response model that counts its to_dict conversions."""
+
+    def __init__(self):
+        self.to_dict_calls = 0
+
+    def to_dict(self) -> dict:
+        self.to_dict_calls += 1
+        return {"id": "response-1"}
+
+
+def test_base_model_output_construction():
+    output = BaseModelOutput(content="content", full_response={"key": "value"})
+
+    assert output.content == "content"
+    assert output.full_response == {"key": "value"}
+    assert BaseModelOutput(content="content").full_response is None
+
+
+def test_base_model_output_converts_raw_model_once():
+    raw_model = FakeRawModel()
+    output = BaseModelOutput(content="content", raw_model=raw_model)
+    assert raw_model.to_dict_calls == 0
+
+    assert output.full_response == {"id": "response-1"}
+    assert output.full_response == {"id": "response-1"}
+
+    assert raw_model.to_dict_calls == 1
+
+
+def test_base_model_output_equality_and_hash_are_stable():
+    output = BaseModelOutput(content="content", raw_model=FakeRawModel())
+    other = BaseModelOutput(content="content")
+    before = hash(output)
+
+    assert output.full_response is not None
+
+    assert hash(output) == before
+    assert output == other
+
+
+def test_base_model_output_is_frozen():
+    output = BaseModelOutput(content="content")
+
+    with pytest.raises(FrozenInstanceError):
+        output.content = "changed"  # type: ignore[misc]
+
+
+def test_base_model_response_defaults_and_frozen():
+    response = BaseModelResponse(output=BaseModelOutput(content="content"))
+
+    assert response.output.content == "content"
+    assert response.parsed_response is None
+    assert response.history == []
+    assert response.tool_calls == []
+    assert response.metrics is None
+    assert response.cache_hit is None
+    assert BaseModelResponse(output=response.output).history is not response.history
+    with pytest.raises(FrozenInstanceError):
+        response.cache_hit = True  # type: ignore[misc]